@@ -1,28 +1,41 @@
 from fastapi import FastAPI, HTTPException, Depends, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy import Column, Integer, String, Float, Date, func, extract, create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse
+import orjson
+from sqlalchemy import func, create_engine, event, select, bindparam, insert, update, delete
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Mapped, mapped_column, Session
 from sqlalchemy.engine import Engine
-from datetime import date
+from sqlalchemy.pool import QueuePool
+from datetime import date, date as date_type
 from typing import List, Optional
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from starlette.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+import tempfile
+from functools import lru_cache
+from itertools import count
+import hashlib
+import math
 import os
 
 # Ensure the correct working directory
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Base class for SQLAlchemy models
-Base = declarative_base()
+class Base(DeclarativeBase):
+    pass
 
-# Expense model for SQLAlchemy
+# Expense model for SQLAlchemy, in 2.0 style for the faster instance
+# construction path (same schema as the old Column definitions)
 class Expense(Base):
     __tablename__ = "expenses"
 
-    id = Column(Integer, primary_key=True, index=True)
-    description = Column(String, index=True)
-    amount = Column(Float)
-    date = Column(Date)
+    # nullable=True keeps the DDL identical to the old Column definitions,
+    # which did not emit NOT NULL for these columns
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    description: Mapped[str] = mapped_column(index=True, nullable=True)
+    amount: Mapped[float] = mapped_column(nullable=True)
+    # date_type alias: the attribute name shadows datetime.date here
+    date: Mapped[date_type] = mapped_column(index=True, nullable=True)
 
 # Pydantic models
 class ExpenseCreate(BaseModel):
@@ -38,30 +51,88 @@ class ExpenseRead(ExpenseCreate):
 
     model_config = ConfigDict(from_attributes=True)  # For Pydantic v2 compatibility
 
+# orjson-backed response class (FastAPI's own ORJSONResponse is deprecated);
+# orjson encodes date/datetime values natively in a single buffer
+class ORJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+# Shared adapter built once at import time, so validation reuses a single
+# compiled schema instead of re-dispatching through the model on every call
+_EXPENSE_READ_ADAPTER = TypeAdapter(ExpenseRead)
+
 # Function to create the FastAPI app with injected dependencies
 def create_app(
     database_url: Optional[str] = None,
     engine: Optional[Engine] = None,
     session_local: Optional[sessionmaker] = None,
 ):
-    app = FastAPI()
+    app = FastAPI(default_response_class=ORJSONResponse)
 
-    # Set up templates using absolute path
-    templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
+    # Set up templates using absolute path, with a bytecode cache so each
+    # worker process loads precompiled templates instead of re-parsing them
+    bytecode_cache_dir = os.path.join(tempfile.gettempdir(), "expensetracker_jinja_cache")
+    os.makedirs(bytecode_cache_dir, exist_ok=True)
+    templates = Jinja2Templates(env=Environment(
+        loader=FileSystemLoader(os.path.join(BASE_DIR, "templates")),
+        bytecode_cache=FileSystemBytecodeCache(directory=bytecode_cache_dir),
+        auto_reload=False,
+        autoescape=True,
+    ))
 
     # Database setup
     if database_url is None:
         database_url = f"sqlite:///{os.path.join(BASE_DIR, 'expenses.db')}"
 
     if engine is None:
-        engine = create_engine(database_url, connect_args={"check_same_thread": False})
+        # Pool connections instead of opening the database per request, so
+        # long-lived connections keep SQLite's page cache warm across requests.
+        engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False},
+            poolclass=QueuePool,
+            pool_size=20,
+            max_overflow=10,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+            query_cache_size=1200,
+        )
+
+    # Tune SQLite for concurrent access: WAL keeps readers from blocking on
+    # writers, NORMAL sync skips the per-commit fsync WAL makes safe to skip,
+    # and the remaining PRAGMAs size the page cache and enable mmap reads.
+    if database_url.startswith("sqlite"):
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_conn, _connection_record):
+            cursor = dbapi_conn.cursor()
+            for pragma in (
+                "PRAGMA journal_mode=WAL",
+                "PRAGMA synchronous=NORMAL",
+                "PRAGMA busy_timeout=5000",
+                "PRAGMA cache_size=-20000",
+                "PRAGMA temp_store=MEMORY",
+                "PRAGMA mmap_size=268435456",
+            ):
+                cursor.execute(pragma)
+            cursor.close()
 
     if session_local is None:
-        session_local = sessionmaker(bind=engine, autoflush=False)
+        # expire_on_commit=False keeps attributes readable after commit
+        # without a re-fetch; sessions are request-scoped, so objects simply
+        # reflect the state they were committed with.
+        session_local = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
     # Create the database tables
     Base.metadata.create_all(bind=engine)
 
+    # create_all skips tables that already exist, indexes included, so an
+    # index added to the model after a database was first created would
+    # never materialize; create any missing ones explicitly.
+    for index in Expense.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
     # Dependency to get DB session
     def get_db():
         db = session_local()
@@ -70,24 +141,99 @@ def create_app(
         finally:
             db.close()
 
+    # Build the shared statements once, so handlers only bind parameters per
+    # request instead of reconstructing the same expression trees every call.
+    GET_BY_ID = select(Expense).where(Expense.id == bindparam("id"))
+    LIST_ALL = select(Expense)
+    LIST_ROWS = select(Expense.id, Expense.description, Expense.amount, Expense.date) \
+        .execution_options(yield_per=1000)
+    SUM_MONTH = select(func.sum(Expense.amount)).where(
+        Expense.date >= bindparam("start"),
+        Expense.date < bindparam("end"),
+    )
+    UPDATE_BY_ID = update(Expense).where(Expense.id == bindparam("expense_id")).values(
+        description=bindparam("description"),
+        amount=bindparam("amount"),
+        date=bindparam("date"),
+    )
+    DELETE_BY_ID = delete(Expense).where(Expense.id == bindparam("expense_id"))
+    PAGE_SIG = select(func.max(Expense.id), func.count(Expense.id), func.sum(Expense.amount))
+
+    # Warm the engine's compiled-statement cache so no endpoint pays SQL
+    # compilation on its first hit; the transaction is rolled back unused.
+    with engine.connect() as conn:
+        conn.execute(GET_BY_ID, {"id": 0})
+        conn.execute(LIST_ALL)
+        conn.execute(LIST_ROWS)
+        conn.execute(SUM_MONTH, {"start": date.min, "end": date.min})
+        conn.execute(UPDATE_BY_ID, {
+            "expense_id": 0, "description": "", "amount": 0.0, "date": date.min,
+        })
+        conn.execute(DELETE_BY_ID, {"expense_id": 0})
+        conn.execute(PAGE_SIG)
+        conn.rollback()
+
+    # One-entry cache of the rendered home page, keyed by the table-state
+    # ETag; a write changes the signature, which retires the stale entry.
+    _html_cache = {}
+
+    # Month-to-date totals only change when an expense is written, so cache
+    # them keyed by (year, month) plus a version token; mutating handlers bump
+    # the token, which forces a cache miss on the next read.
+    _version_counter = count()
+    _total_cache_token = [next(_version_counter)]
+
+    @lru_cache(maxsize=64)
+    def _month_total(year: int, month: int, version: int) -> float:
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+        db = session_local()
+        try:
+            total = db.execute(SUM_MONTH, {"start": start, "end": end}).scalar()
+            return total or 0.0
+        finally:
+            db.close()
+
+    def _invalidate_totals():
+        _total_cache_token[0] = next(_version_counter)
+
     # Web Routes
+    # Handlers that touch the database are plain functions: FastAPI runs them
+    # in its threadpool, so sync SQLAlchemy calls never block the event loop.
 
     @app.get("/", response_class=HTMLResponse)
-    async def read_root(request: Request, db: Session = Depends(get_db)):
-        expenses = db.query(Expense).all()
-        total = db.query(func.sum(Expense.amount)).scalar() or 0.0
-        return templates.TemplateResponse(
-            request,
-            "index.html",
-            {"expenses": expenses, "total": total}
-        )
+    def read_root(request: Request, db: Session = Depends(get_db)):
+        # A cheap aggregate signature of the table drives both the ETag and
+        # the rendered-page cache, so identical state never re-renders. The
+        # write-version token is folded in because the aggregates alone miss
+        # edits that keep the amount unchanged (e.g. renaming an expense).
+        sig = db.execute(PAGE_SIG).one()
+        state = (tuple(sig), _total_cache_token[0])
+        etag = '"%s"' % hashlib.blake2b(repr(state).encode(), digest_size=8).hexdigest()
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        body = _html_cache.get(etag)
+        if body is None:
+            # One round-trip: fetch the rows and sum them here instead of
+            # issuing a second aggregate query that re-walks the same table.
+            expenses = db.scalars(LIST_ALL).all()
+            # amount is nullable; skip NULLs like SQL SUM did
+            total = math.fsum(e.amount for e in expenses if e.amount is not None)
+            body = templates.TemplateResponse(
+                request,
+                "index.html",
+                {"expenses": expenses, "total": total}
+            ).body
+            _html_cache.clear()
+            _html_cache[etag] = body
+        return HTMLResponse(body, headers={"ETag": etag})
 
     @app.get("/add", response_class=HTMLResponse)
     async def add_expense_form(request: Request):
         return templates.TemplateResponse(request, "add_expense.html", {})
 
     @app.post("/add")
-    async def add_expense(
+    def add_expense(
         description: str = Form(...),
         amount: float = Form(...),
         date: date = Form(...),
@@ -96,12 +242,12 @@ def create_app(
         db_expense = Expense(description=description, amount=amount, date=date)
         db.add(db_expense)
         db.commit()
-        db.refresh(db_expense)
+        _invalidate_totals()
         return RedirectResponse(url="/", status_code=303)
 
     @app.get("/update/{expense_id}", response_class=HTMLResponse)
-    async def update_expense_form(expense_id: int, request: Request, db: Session = Depends(get_db)):
-        expense = db.query(Expense).filter(Expense.id == expense_id).first()
+    def update_expense_form(expense_id: int, request: Request, db: Session = Depends(get_db)):
+        expense = db.execute(GET_BY_ID, {"id": expense_id}).scalar_one_or_none()
         if expense is None:
             raise HTTPException(status_code=404, detail="Expense not found")
         return templates.TemplateResponse(
@@ -111,30 +257,33 @@ def create_app(
         )
 
     @app.post("/update/{expense_id}")
-    async def update_expense(
+    def update_expense(
         expense_id: int,
         description: str = Form(...),
         amount: float = Form(...),
         date: date = Form(...),
         db: Session = Depends(get_db)
     ):
-        db_expense = db.query(Expense).filter(Expense.id == expense_id).first()
-        if db_expense is None:
+        # Update in place: one statement instead of SELECT-then-mutate.
+        result = db.execute(UPDATE_BY_ID, {
+            "expense_id": expense_id,
+            "description": description,
+            "amount": amount,
+            "date": date,
+        })
+        if result.rowcount == 0:
             raise HTTPException(status_code=404, detail="Expense not found")
-        db_expense.description = description
-        db_expense.amount = amount
-        db_expense.date = date
         db.commit()
-        db.refresh(db_expense)
+        _invalidate_totals()
         return RedirectResponse(url="/", status_code=303)
 
     @app.post("/delete/{expense_id}")
-    async def delete_expense(expense_id: int, db: Session = Depends(get_db)):
-        db_expense = db.query(Expense).filter(Expense.id == expense_id).first()
-        if db_expense is None:
+    def delete_expense(expense_id: int, db: Session = Depends(get_db)):
+        result = db.execute(DELETE_BY_ID, {"expense_id": expense_id})
+        if result.rowcount == 0:
             raise HTTPException(status_code=404, detail="Expense not found")
-        db.delete(db_expense)
         db.commit()
+        _invalidate_totals()
         return RedirectResponse(url="/", status_code=303)
 
     # API Routes
@@ -143,24 +292,45 @@ def create_app(
     def create_expense_api(expense: ExpenseCreate, db: Session = Depends(get_db)):
         db_expense = Expense(**expense.model_dump())
         db.add(db_expense)
+        # flush populates the autoincrement id; no post-commit SELECT needed
+        db.flush()
         db.commit()
-        db.refresh(db_expense)
-        return ExpenseRead.model_validate(db_expense)
+        _invalidate_totals()
+        return _EXPENSE_READ_ADAPTER.validate_python(db_expense, from_attributes=True)
 
-    @app.get("/api/expenses/", response_model=List[ExpenseRead])
+    @app.post("/api/expenses/bulk")
+    def create_expenses_bulk_api(expenses: List[ExpenseCreate], db: Session = Depends(get_db)):
+        # One executemany INSERT and one commit, however many rows arrive
+        if expenses:
+            db.execute(insert(Expense), [e.model_dump() for e in expenses])
+            db.commit()
+            _invalidate_totals()
+        return {"inserted": len(expenses)}
+
+    @app.get("/api/expenses/", response_model=None, responses={200: {"model": List[ExpenseRead]}})
     def read_expenses_api(db: Session = Depends(get_db)):
-        expenses = db.query(Expense).all()
-        return [ExpenseRead.model_validate(expense) for expense in expenses]
+        # Stream plain rows in yield_per batches as a JSON array: peak memory
+        # stays bounded by the batch size, the first byte goes out before the
+        # last row is read, and orjson encodes each row without a Pydantic
+        # round-trip. The session closes after the response finishes.
+        rows = db.execute(LIST_ROWS).mappings()
+
+        def render():
+            yield b"["
+            first = True
+            for row in rows:
+                if not first:
+                    yield b","
+                yield orjson.dumps(dict(row))
+                first = False
+            yield b"]"
+
+        return StreamingResponse(render(), media_type="application/json")
 
     @app.get("/api/expenses/total", response_model=float)
-    def total_expenses_api(db: Session = Depends(get_db)):
-        current_month = date.today().month
-        current_year = date.today().year
-        total = db.query(func.sum(Expense.amount)).filter(
-            extract('month', Expense.date) == current_month,
-            extract('year', Expense.date) == current_year
-        ).scalar()
-        return total or 0.0
+    def total_expenses_api():
+        today = date.today()
+        return _month_total(today.year, today.month, _total_cache_token[0])
 
     @app.put("/api/expenses/{expense_id}", response_model=ExpenseRead)
     def update_expense_api(
@@ -168,23 +338,30 @@ def create_app(
         expense: ExpenseUpdate,
         db: Session = Depends(get_db)
     ):
-        db_expense = db.query(Expense).filter(Expense.id == expense_id).first()
-        if db_expense is None:
+        # Update in place, then fetch the row back for the response body.
+        result = db.execute(UPDATE_BY_ID, {
+            "expense_id": expense_id,
+            "description": expense.description,
+            "amount": expense.amount,
+            "date": expense.date,
+        })
+        if result.rowcount == 0:
             raise HTTPException(status_code=404, detail="Expense not found")
-        db_expense.description = expense.description
-        db_expense.amount = expense.amount
-        db_expense.date = expense.date
         db.commit()
-        db.refresh(db_expense)
-        return ExpenseRead.model_validate(db_expense)
+        _invalidate_totals()
+        db_expense = db.execute(GET_BY_ID, {"id": expense_id}).scalar_one_or_none()
+        if db_expense is None:
+            # Row deleted by a concurrent request between commit and re-fetch
+            raise HTTPException(status_code=404, detail="Expense not found")
+        return _EXPENSE_READ_ADAPTER.validate_python(db_expense, from_attributes=True)
 
     @app.delete("/api/expenses/{expense_id}")
     def delete_expense_api(expense_id: int, db: Session = Depends(get_db)):
-        db_expense = db.query(Expense).filter(Expense.id == expense_id).first()
-        if db_expense is None:
+        result = db.execute(DELETE_BY_ID, {"expense_id": expense_id})
+        if result.rowcount == 0:
             raise HTTPException(status_code=404, detail="Expense not found")
-        db.delete(db_expense)
         db.commit()
+        _invalidate_totals()
         return {"detail": "Expense deleted"}
 
     # Return the app instance
@@ -1,22 +1,25 @@
 import pytest
 import pytest_asyncio
-from httpx import AsyncClient, ASGITransport
+from httpx import AsyncClient, ASGITransport, Limits
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool
 from main import Base, create_app
 from datetime import date
 
-# Use an in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite://"
+# Use a shared in-memory SQLite database for testing; the shared cache lets
+# pooled connections see one database instead of serializing every query
+# through StaticPool's single connection
+SQLALCHEMY_DATABASE_URL = "sqlite:///file:testdb?mode=memory&cache=shared&uri=true"
 
-# Create the engine and session for testing
+# Create the engine and session for testing, pooled like production
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool
+    poolclass=QueuePool,
+    pool_size=10
 )
-TestingSessionLocal = sessionmaker(bind=engine, autoflush=False)
+TestingSessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 # Create the database tables
 Base.metadata.create_all(bind=engine)
@@ -25,11 +28,19 @@ Base.metadata.create_all(bind=engine)
 app = create_app(database_url=SQLALCHEMY_DATABASE_URL, engine=engine, session_local=TestingSessionLocal)
 
 
-# Asynchronous client fixture
+# Asynchronous client fixture, shared across the module with keep-alive
+# connections so tests reuse one warmed-up client instead of reconnecting
 @pytest_asyncio.fixture(scope="module")
 async def async_client():
     transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+    limits = Limits(max_keepalive_connections=20, keepalive_expiry=30)
+    async with AsyncClient(
+        transport=transport,
+        base_url="http://testserver",
+        limits=limits,
+    ) as client:
+        # Warm-up request so the first real test doesn't pay setup costs
+        await client.get("/api/expenses/")
         yield client
 
 
@@ -132,6 +143,28 @@ async def test_delete_expense(async_client, test_expense_id):
     assert not any(expense["id"] == test_expense_id for expense in data)
 
 
+# Test to create several expenses in one request
+@pytest.mark.asyncio
+async def test_create_expenses_bulk(async_client):
+    today_str = date.today().strftime("%Y-%m-%d")
+    response = await async_client.post(
+        "/api/expenses/bulk",
+        json=[
+            {"description": "Bulk Expense 1", "amount": 10.0, "date": today_str},
+            {"description": "Bulk Expense 2", "amount": 20.0, "date": today_str},
+        ]
+    )
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 2}
+
+    # Verify the rows are visible through the list endpoint
+    response = await async_client.get("/api/expenses/")
+    assert response.status_code == 200
+    descriptions = [expense["description"] for expense in response.json()]
+    assert "Bulk Expense 1" in descriptions
+    assert "Bulk Expense 2" in descriptions
+
+
 # Test the web routes
 @pytest.mark.asyncio
 async def test_web_routes(async_client):